@@ -5,6 +5,12 @@ import time
 import argparse
 import pathspec
 import hashlib
+import sqlite3
+import io
+import mmap
+import threading
+import numpy as np
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 from helix import Client, Instance
 
@@ -19,6 +25,10 @@ JS_LANGUAGE = Language(tree_sitter_javascript.language())
 py_parser = Parser(PY_LANGUAGE)
 js_parser = Parser(JS_LANGUAGE)
 
+# Files worth parsing, and which parser handles each extension
+SUPPORTED_EXTS = frozenset({'.py', '.js'})
+PARSER_BY_EXT = {'.py': py_parser, '.js': js_parser}
+
 # Maximum depth of sub entities to process
 MAX_DEPTH = 2
 
@@ -33,12 +43,105 @@ client = Client(local=True, verbose=False)
 MAX_WORKERS = min(os.cpu_count()//2, 8)
 executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
 
+# Bounded pool for embedding batches and their vector writes, kept separate
+# from the directory-walk pool so waiting on it can't starve file processing
+embed_executor = ThreadPoolExecutor(max_workers=4)
+
+# Parsing is CPU-bound C code that releases the GIL, so it gets a pool sized
+# to the machine; the walk pool above stays small since it mostly blocks on
+# the network
+parse_executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+
 # Cache for seen files to avoid re-parsing
 seen_files = set()
 
 # Cache for directory-specific PathSpecs
 spec_map = {}
 
+# Version tag for cached tree dicts; bump whenever the dict shape changes
+# (v2: nodes carry byte offsets only, no pre-decoded text; v3: blobs are
+# numpy column arrays rather than pickled nested dicts)
+AST_CACHE_VERSION = 3
+
+# Cache keys don't need a cryptographic digest; blake2b-128 is the fastest
+# option in the stdlib (xxhash isn't a dependency here). HELIX_STRONG_HASH=1
+# switches back to sha256.
+_STRONG_HASH = os.getenv('HELIX_STRONG_HASH') == '1'
+
+def content_digest(source_code):
+    if _STRONG_HASH:
+        return hashlib.sha256(source_code).digest()
+    return hashlib.blake2b(source_code, digest_size=16).digest()
+
+# Persistent AST cache: re-ingestion re-parses only files whose bytes changed.
+# WAL so concurrent worker threads can read while one writes.
+AST_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.helix_cache', 'ast.db')
+os.makedirs(os.path.dirname(AST_CACHE_PATH), exist_ok=True)
+ast_cache = sqlite3.connect(AST_CACHE_PATH, check_same_thread=False)
+ast_cache.execute('PRAGMA journal_mode=WAL')
+ast_cache.execute('CREATE TABLE IF NOT EXISTS trees (path TEXT, hash BLOB, version INTEGER, node_dict BLOB, PRIMARY KEY (path, version))')
+ast_cache_lock = threading.Lock()
+
+def _serialize_tree(tree_dict):
+    """Flatten the nested dict into parallel column arrays and savez them.
+    (De)serializing a handful of flat arrays beats pickling nested dicts and
+    the blobs come out markedly smaller."""
+    types, starts, ends, orders, parents = [], [], [], [], []
+    stack = [(tree_dict, -1)]
+    while stack:
+        node, parent_idx = stack.pop()
+        idx = len(types)
+        types.append(node['type'])
+        starts.append(node['start_byte'])
+        ends.append(node['end_byte'])
+        orders.append(node['order'])
+        parents.append(parent_idx)
+        # Reversed so siblings pop in source order, keeping preorder layout
+        for child in reversed(node.get('children', [])):
+            stack.append((child, idx))
+
+    buffer = io.BytesIO()
+    np.savez(buffer,
+             types=np.array(types),
+             starts=np.array(starts, dtype=np.int64),
+             ends=np.array(ends, dtype=np.int64),
+             orders=np.array(orders, dtype=np.int32),
+             parents=np.array(parents, dtype=np.int32))
+    return buffer.getvalue()
+
+def _deserialize_tree(blob):
+    data = np.load(io.BytesIO(blob))
+    types, starts, ends = data['types'], data['starts'], data['ends']
+    orders, parents = data['orders'], data['parents']
+
+    nodes = []
+    for i in range(len(types)):
+        node = {
+            "type": str(types[i]),
+            "start_byte": int(starts[i]),
+            "end_byte": int(ends[i]),
+            "order": int(orders[i]),
+            "children": []
+        }
+        nodes.append(node)
+        parent_idx = int(parents[i])
+        if parent_idx >= 0:
+            # Preorder guarantees the parent was rebuilt already
+            nodes[parent_idx]['children'].append(node)
+    return nodes[0] if nodes else None
+
+def load_cached_tree(file_path, digest):
+    with ast_cache_lock:
+        row = ast_cache.execute('SELECT node_dict FROM trees WHERE path = ? AND version = ? AND hash = ?',
+                                (file_path, AST_CACHE_VERSION, digest)).fetchone()
+    return _deserialize_tree(row[0]) if row is not None else None
+
+def store_cached_tree(file_path, digest, tree_dict):
+    # Committed once per ingestion run rather than per insert
+    with ast_cache_lock:
+        ast_cache.execute('INSERT OR REPLACE INTO trees VALUES (?, ?, ?, ?)',
+                          (file_path, digest, AST_CACHE_VERSION, _serialize_tree(tree_dict)))
+
 # Ingestion function
 def ingestion(root_path):
     # Ensure root_path is absolute
@@ -50,14 +153,80 @@ def ingestion(root_path):
     root_id = client.query('createRoot', {'name': root_path})[0]['root'][0]['id']
     populate(root_path, parent_id=root_id, gitignore_specs=gitignore_specs, root_dir=root_dir)
 
+    # Persist any tree dicts cached during this run
+    with ast_cache_lock:
+        ast_cache.commit()
+
 # Modifiable helper functions
 # TODO: Replace with actual chunking function
 def chunk_entity(text:str):
     return [text[i:i+1000] for i in range(0, len(text), 1000)]
 
+# Shared generator; default_rng fills float32 buffers in C, no per-element boxing
+_RNG = np.random.default_rng()
+
+def random_embeddings_batch(n, dim=768):
+    """One (n, dim) draw standing in for a real batched embedding call."""
+    return _RNG.random((n, dim), dtype=np.float32)
+
 # TODO: Replace with actual embedding function
 def random_embedding(text:str):
-    return [0.1 for _ in range(768)]
+    return random_embeddings_batch(1)[0]
+
+# Upper bound on chunks handed to the embedder in a single call
+EMBED_BATCH_SIZE = 64
+
+# TODO: Swap for a real batched call (embed_content with contents=texts)
+def embed_batch(texts:list):
+    return random_embeddings_batch(len(texts))
+
+# Quantization applied to vectors before they go to Helix: 'int8' shrinks the
+# payload ~4x, 'binary' keeps only sign bits (~32x), 'none' sends as-is
+QUANTIZE_MODE = os.getenv('HELIX_QUANTIZE_MODE', 'int8')
+
+def quantize(vec, mode=None):
+    """Quantize an embedding for storage/search.
+
+    The schema has no narrower vector type than [F64], so the saving is in
+    payload bytes rather than at-rest type width. Query vectors have to pass
+    through the same mode (see quantize_vec in mcp_server/server.py) or
+    similarity scores are meaningless.
+    """
+    mode = QUANTIZE_MODE if mode is None else mode
+    v = np.asarray(vec, dtype=np.float32)
+    if mode == 'int8':
+        peak = float(np.max(np.abs(v))) or 1.0
+        return np.rint(v * (127.0 / peak)).astype(np.int8).tolist()
+    if mode == 'binary':
+        return (v > 0).astype(np.int8).tolist()
+    return v.tolist()
+
+def _embed_and_insert(batch):
+    texts = [chunk for _, chunk in batch]
+    try:
+        vectors = embed_batch(texts)
+    except Exception as e:
+        # Degrade to one call per chunk rather than dropping the batch
+        print(f"Batch embedding failed, falling back to sequential: {e}")
+        vectors = [random_embedding(text) for text in texts]
+
+    payload = [{'entity_id': entity_id, 'vector': quantize(vector)} for (entity_id, _), vector in zip(batch, vectors)]
+    client.query('embedSuperEntity', payload)
+
+def flush_file_embeddings(pending):
+    """Embed and insert a file's (entity_id, chunk) pairs as concurrent batches.
+
+    Vector inserts are independent of each other (only create* calls have
+    parent/child ordering), so every batch can be in flight at once, bounded
+    by the embed pool size.
+    """
+    futures = [embed_executor.submit(_embed_and_insert, pending[start:start + EMBED_BATCH_SIZE])
+               for start in range(0, len(pending), EMBED_BATCH_SIZE)]
+    for future in futures:
+        try:
+            future.result()
+        except Exception as e:
+            print(f"Error in embedding batch: {e}")
 
 # Helper functions
 def populate(full_path, curr_type='root', parent_id=None, gitignore_specs=None, root_dir=None):
@@ -97,7 +266,7 @@ def populate(full_path, curr_type='root', parent_id=None, gitignore_specs=None,
     print(f'\nProcessing {len(dir_dict["files"])} files')
     
     # Filter out ignored files
-    files_to_process = [file for file in dir_dict["files"] if not is_ignored(os.path.join(full_path, file), gitignore_specs, root_dir)]
+    files_to_process = [file for file in dir_dict["files"] if not is_ignored(os.path.join(full_path, file), gitignore_specs, root_dir, is_dir=False)]
     
     # Submit file processing tasks to the thread pool
     file_futures = []
@@ -124,67 +293,59 @@ def populate(full_path, curr_type='root', parent_id=None, gitignore_specs=None,
             future.result()
         except Exception as e:
             print(f"Error in folder processing: {e}")
-    
-    del dir_dict
 
 def process_file(file, full_path, curr_type, parent_id):
     print(f"{file} is from {curr_type}")
     try:
-        parser = None
-        if file.endswith('.py'):
-            parser = py_parser
-        # elif file.endswith('.js'):
-        #     parser = js_parser
-        elif file == '.gitignore':
-            parser = None
+        parser = PARSER_BY_EXT.get(os.path.splitext(file)[1])
         
         if parser is not None:
             # Extract python code structure with tree-sitter
             file_path = os.path.join(full_path, file)
             extension = file.split('.')[-1]
-            tree, code = parse_file(file_path, parser)
+            tree_dict, source_code = extract_file_tree(file_path, parser)
 
-            if tree:
-                tree_dict = node_to_dict(tree.root_node, code, 0)
-                del tree
-                del code
+            if not tree_dict:
+                print(f'Failed to parse file: {file}')
+                return False
 
+            try:
+                file_text = node_text(tree_dict, source_code)
                 if curr_type == 'root':
                     # Create super file
-                    file_id = client.query('createSuperFile', {'root_id': parent_id, 'name': file, 'extension': extension, 'text': tree_dict['text']})[0]['file'][0]['id']
+                    file_id = client.query('createSuperFile', {'root_id': parent_id, 'name': file, 'extension': extension, 'text': file_text})[0]['file'][0]['id']
                 else:
                     # Create sub file
-                    file_id = client.query('createFile', {'folder_id': parent_id, 'name': file, 'extension': extension, 'text': tree_dict['text']})[0]['file'][0]['id']
+                    file_id = client.query('createFile', {'folder_id': parent_id, 'name': file, 'extension': extension, 'text': file_text})[0]['file'][0]['id']
 
                 children = tree_dict['children']
-                del tree_dict
 
                 print(f"\nProcessing {len(children)} super entities in {file}")
+                pending_chunks = []
+                super_roots = []
                 for superentity in children:
+                    entity_text = node_text(superentity, source_code)
+
                     # Create super entity
-                    super_entity_id = client.query('createSuperEntity', {'file_id': file_id, 'entity_type': superentity['type'], 'start_byte': superentity['start_byte'], 'end_byte': superentity['end_byte'], 'order': superentity['order'], 'text': superentity['text']})[0]['entity'][0]['id']
-                    
-                    # Embed super entity
-                    chunks = chunk_entity(superentity['text'])
-                    for chunk in chunks:
-                        client.query('embedSuperEntity', {'entity_id':super_entity_id, 'vector': random_embedding(chunk)})
-                        del chunk
+                    super_entity_id = client.query('createSuperEntity', {'file_id': file_id, 'entity_type': superentity['type'], 'start_byte': superentity['start_byte'], 'end_byte': superentity['end_byte'], 'order': superentity['order'], 'text': entity_text})[0]['entity'][0]['id']
+
+                    # Collect chunks; the whole file embeds in a few batched calls below
+                    for chunk in chunk_entity(entity_text):
+                        pending_chunks.append((super_entity_id, chunk))
 
-                    del chunks
+                    super_roots.append((superentity, super_entity_id))
 
-                    process_entities(superentity, super_entity_id)
-                    
-                    del superentity
+                # One walk covers every superentity, so sibling writes batch
+                # across all of them
+                process_entities(super_roots, source_code)
+
+                flush_file_embeddings(pending_chunks)
 
-                del children
                 return True
-            else:
-                print(f'Failed to parse file: {file}')
-                if tree is not None:
-                    del tree
-                if code is not None:
-                    del code
-                return False
+            finally:
+                # Release the mapping only after every write that decodes
+                # from it has finished
+                _close_source(source_code)
         else:
             print(f'Ignored: {file}')
             return False
@@ -192,50 +353,128 @@ def process_file(file, full_path, curr_type, parent_id):
         print(f"Error processing file {file}: {e}")
         return False
 
-def process_entities(parent_dict, parent_id, step = 0):
-    if step < MAX_DEPTH and 'children' in parent_dict and len(parent_dict['children']) > 0:
+def process_entities(roots, source_code):
+    """Create a file's sub entities from an explicit queue, breadth-first.
+
+    roots is every (superentity_dict, id) pair of the file; walking them
+    together means one bulk createSubEntity covers all siblings at a depth
+    across the whole file, and no recursion depth limit applies. order is
+    stored on each node, so batching doesn't lose sibling ordering.
+    """
+    queue = deque((node_dict, node_id, 0) for node_dict, node_id in roots)
+    while queue:
+        step = queue[0][2]
+        if step >= MAX_DEPTH:
+            break
+
+        # Drain everything queued at this depth; their children form one batch
+        payload = []
+        next_nodes = []
+        while queue and queue[0][2] == step:
+            node_dict, node_id, _ = queue.popleft()
+            for entity in node_dict.get('children', []):
+                payload.append({'entity_id': node_id, 'entity_type': entity['type'], 'start_byte': entity['start_byte'], 'end_byte': entity['end_byte'], 'order': entity['order'], 'text': node_text(entity, source_code)})
+                next_nodes.append(entity)
 
-        children = parent_dict['children']
-        payload = [{'entity_id': parent_id, 'entity_type': entity['type'], 'start_byte': entity['start_byte'], 'end_byte': entity['end_byte'], 'order': entity['order'], 'text': entity['text']} for entity in children]
-        
         if len(payload) < 1:
-            return
+            continue
         entity_ids = [entity['entity'][0]['id'] for entity in client.query('createSubEntity', payload)]
-        del payload
 
-        for i in range(len(entity_ids)):
-            process_entities(children[i], entity_ids[i], step + 1)
+        queue.extend((entity, entity_id, step + 1) for entity, entity_id in zip(next_nodes, entity_ids))
 
-        del children
-        del entity_ids
+def _close_source(source_code):
+    if isinstance(source_code, mmap.mmap):
+        source_code.close()
 
-def parse_file(file_path, parser):
+def _parse_to_dict(parser, source_code):
+    # Runs on parse_executor: the parse and the dict build are the CPU work
+    tree = parser.parse(source_code)
+    if tree is None:
+        return None
+    return node_to_dict(tree.root_node, source_code, 0)
+
+def extract_file_tree(file_path, parser):
+    """Return (tree_dict, source_bytes), with the dict served from the AST
+    cache when the content hash matches. Node text lives in source_bytes and
+    is decoded lazily via node_text."""
     try:
         with open(file_path, 'rb') as file:
-            source_code = file.read()
-            
-        # Calculate file hash to avoid re-parsing identical files
-        file_hash = hashlib.sha1(source_code).hexdigest()
-        if file_hash in seen_files:
+            try:
+                # Map instead of read: no heap copy of the file, and pages
+                # are shared however many files are in flight. The caller
+                # closes the map once the file's entity writes are done.
+                source_code = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files (and platforms without mmap support for this
+                # mode) fall back to an ordinary read
+                source_code = file.read()
+
+        digest = content_digest(source_code)
+
+        # Skip files whose exact content was already ingested
+        if digest in seen_files:
             print(f"Ignored duplicate: {file_path}")
+            _close_source(source_code)
             return None, None
-            
-        seen_files.add(file_hash)
-        return parser.parse(source_code), source_code
+        seen_files.add(digest)
+
+        tree_dict = load_cached_tree(file_path, digest)
+        if tree_dict is not None:
+            return tree_dict, source_code
+
+        tree_dict = parse_executor.submit(_parse_to_dict, parser, source_code).result()
+        if tree_dict is None:
+            _close_source(source_code)
+            return None, None
+
+        store_cached_tree(file_path, digest, tree_dict)
+        return tree_dict, source_code
     except Exception as e:
         print(f"Error parsing {file_path}: {e}")
         return None, None
 
-def node_to_dict(node, source_code, order:int=1):
+def _make_node(node, order):
     return {
         "type": node.type,
         "start_byte": node.start_byte,
         "end_byte": node.end_byte,
         "order": order,
-        "text": source_code[node.start_byte:node.end_byte].decode('utf8'),
-        "children": [node_to_dict(child, source_code, i+1) for i, child in enumerate(node.children)]
+        "children": []
     }
 
+def node_text(node_dict, source_code):
+    """Decode a node's text from the source bytes only when it is actually needed."""
+    return source_code[node_dict['start_byte']:node_dict['end_byte']].decode('utf8')
+
+def node_to_dict(node, source_code, order:int=1):
+    # DFS over a TreeCursor rather than recursing per node: cursor moves run
+    # in C and skip building per-node child lists, and the stack replaces a
+    # Python frame per node. stack[-1] always mirrors the cursor's position.
+    # The 'descended' flag stops the walk re-entering a finished subtree
+    # after coming back up.
+    cursor = node.walk()
+    result = _make_node(cursor.node, order)
+    stack = [result]
+    descended = True
+    while True:
+        if descended and cursor.goto_first_child():
+            parent = stack[-1]
+            record = _make_node(cursor.node, len(parent["children"]) + 1)
+            parent["children"].append(record)
+            stack.append(record)
+        elif cursor.goto_next_sibling():
+            stack.pop()
+            parent = stack[-1]
+            record = _make_node(cursor.node, len(parent["children"]) + 1)
+            parent["children"].append(record)
+            stack.append(record)
+            descended = True
+        elif cursor.goto_parent():
+            stack.pop()
+            descended = False
+        else:
+            return result
+
 # Cache for PathSpec objects to avoid rebuilding them
 _spec_cache = {}
 
@@ -262,14 +501,15 @@ def get_spec_for_path(path, gitignore_specs):
     if abs_path in spec_map:
         return spec_map[abs_path]
     
-    # Check for a .gitignore file in the current directory
+    # Callers only get here when the scandir pass saw a .gitignore entry,
+    # so no isfile probe is needed
     local_gitignore = os.path.join(abs_path, '.gitignore')
     
     # Start with a copy of the existing specs
     path_specs = dict(gitignore_specs) if gitignore_specs else {}
     
-    # Add the local .gitignore if it exists and hasn't been processed
-    if os.path.isfile(local_gitignore) and abs_path not in path_specs:
+    # Add the local .gitignore if it hasn't been processed
+    if abs_path not in path_specs:
         try:
             with open(local_gitignore, 'r') as f:
                 patterns = f.read().splitlines()
@@ -330,7 +570,22 @@ def load_gitignore_specs(root_path):
     
     return specs, root_dir
 
-def is_ignored(path, gitignore_specs, root_dir):
+# Deepest-first (abs_dir_path, spec) views of each spec dict, computed once
+# per dict instead of re-sorting and re-resolving paths on every check. The
+# dicts live for the whole run (spec_map holds them), so id() keys are stable.
+_sorted_spec_cache = {}
+
+def _sorted_specs(gitignore_specs):
+    key = id(gitignore_specs)
+    cached = _sorted_spec_cache.get(key)
+    if cached is None:
+        cached = sorted(((os.path.abspath(dir_path), spec)
+                         for dir_path, spec in gitignore_specs.items() if dir_path != "DEFAULT"),
+                        key=lambda item: len(item[0]), reverse=True)
+        _sorted_spec_cache[key] = cached
+    return cached
+
+def is_ignored(path, gitignore_specs, root_dir, is_dir=None):
     """Check if a path is ignored by any gitignore spec."""
     if not gitignore_specs:
         return False
@@ -341,62 +596,36 @@ def is_ignored(path, gitignore_specs, root_dir):
     else:
         abs_path = os.path.abspath(path)
     
-    # For debugging and pattern matching
     basename = os.path.basename(abs_path)
-    
+
+    # Callers that walked a directory already know; stat only when they don't
+    if is_dir is None:
+        is_dir = os.path.isdir(abs_path)
+
     # Special case for default patterns (always check first)
-    if "DEFAULT" in gitignore_specs:
+    default_spec = gitignore_specs.get("DEFAULT")
+    if default_spec is not None:
         # Get the relative path from the root directory
         rel_path = os.path.relpath(abs_path, root_dir)
         
         # Check if the path matches any default pattern
-        if gitignore_specs["DEFAULT"].match_file(rel_path) or gitignore_specs["DEFAULT"].match_file(basename):
+        if default_spec.match_file(rel_path) or default_spec.match_file(basename):
             # print(f"Ignoring {abs_path} due to default ignore pattern")
             return True
     
     # Check each spec, starting from the most specific (closest to the file)
-    for dir_path, spec in sorted(gitignore_specs.items(), key=lambda x: len(x[0]) if x[0] != "DEFAULT" else 0, reverse=True):
-        # Skip the default patterns as we've already checked them
-        if dir_path == "DEFAULT":
-            continue
-            
-        try:
-            # Skip unnecessary path resolution - just use the paths directly for comparison
-            # Only apply specs from directories that are parents of the path
-            try:
-                # For directory paths, ensure they're absolute for comparison
-                if os.path.isabs(dir_path):
-                    abs_dir_path = dir_path
-                else:
-                    abs_dir_path = os.path.abspath(dir_path)
-                    
-                if os.path.commonpath([abs_dir_path, abs_path]) == abs_dir_path:
-                    # Get the relative path from the gitignore directory - no need to resolve again
-                    rel_path = os.path.relpath(abs_path, abs_dir_path)
-                    
-                    # Check if the path matches any pattern in the spec
-                    if spec.match_file(rel_path):
-                        # print(f"Ignoring {abs_path} due to pattern in {dir_path}/.gitignore")
-                        return True
-                    
-                    # Also check just the basename for directory patterns like "test_folder/"
-                    if basename and spec.match_file(basename):
-                        # print(f"Ignoring {abs_path} due to basename match in {dir_path}/.gitignore")
-                        return True
-                    
-                    # Special handling for directory patterns like "test_folder/"
-                    if os.path.isdir(abs_path):
-                        # Try with trailing slash
-                        dir_pattern = f"{basename}/"
-                        if spec.match_file(dir_pattern):
-                            # print(f"Ignoring directory {abs_path} due to pattern {dir_pattern} in {dir_path}/.gitignore")
-                            return True
-            except ValueError:
-                # Skip if paths can't be compared (different drives, etc.)
-                continue
-        except Exception as e:
-            print(f"Error checking if {path} is ignored: {e}")
+    for abs_dir_path, spec in _sorted_specs(gitignore_specs):
+        # Only apply specs from directories that are ancestors of the path;
+        # a prefix test is enough since both sides are absolute
+        if not abs_path.startswith(abs_dir_path + os.sep):
             continue
+
+        # Relative to the gitignore's directory, with a trailing slash so
+        # directory patterns like "test_folder/" still match
+        rel_path = os.path.relpath(abs_path, abs_dir_path)
+        if spec.match_file(rel_path + '/' if is_dir else rel_path):
+            # print(f"Ignoring {abs_path} due to pattern in {abs_dir_path}/.gitignore")
+            return True
     
     return False
 
@@ -413,24 +642,36 @@ def scan_directory(root_path, gitignore_specs=None, root_dir=None):
         gitignore_specs, root_dir = load_gitignore_specs(root_path)
     
     # Check if the directory itself is ignored
-    if is_ignored(root_path, gitignore_specs, root_dir):
+    if is_ignored(root_path, gitignore_specs, root_dir, is_dir=True):
         print(f"Ignored: {root_path}")
         return {"folders": [], "files": []}
     
-    # Get or update gitignore specs for this path
-    gitignore_specs = get_spec_for_path(root_path, gitignore_specs)
-    
-    # Scan directory
-    for entry in os.scandir(root_path):
+    # Collect entries first; DirEntry.is_dir reuses the readdir record, and
+    # a local .gitignore is spotted here without a separate stat
+    entries_info = []
+    has_local_gitignore = False
+    with os.scandir(root_path) as entries:
+        for entry in entries:
+            entry_is_dir = entry.is_dir(follow_symlinks=False)
+            if not entry_is_dir and entry.name == '.gitignore':
+                has_local_gitignore = True
+            entries_info.append((entry.name, entry.path, entry_is_dir))
+
+    # Only fold in a local spec when this directory actually has one;
+    # directories without a .gitignore reuse the inherited dict untouched
+    if has_local_gitignore:
+        gitignore_specs = get_spec_for_path(root_path, gitignore_specs)
+
+    for name, path, entry_is_dir in entries_info:
         # Skip ignored files and folders
-        if is_ignored(entry.path, gitignore_specs, root_dir):
-            print(f"Ignored: {entry.name}")
+        if is_ignored(path, gitignore_specs, root_dir, entry_is_dir):
+            print(f"Ignored: {name}")
             continue
-        
-        if entry.is_dir():
-            folders.append(entry.name)
-        else:
-            files.append(entry.name)
+
+        if entry_is_dir:
+            folders.append(name)
+        elif os.path.splitext(name)[1] in SUPPORTED_EXTS:
+            files.append(name)
     
     return {"folders": folders, "files": files, "gitignore_specs": gitignore_specs, "root_dir": root_dir}
 
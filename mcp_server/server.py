@@ -3,7 +3,10 @@ from fastmcp.server.auth import BearerAuthProvider
 import os
 import helix
 import re
+import functools
 import dotenv
+import numpy as np
+import types
 from typing import Dict, List, Any
 from google import genai
 
@@ -25,10 +28,12 @@ dotenv.load_dotenv(override=True)
 # mcp = FastMCP(name="Helix MCP", auth=auth)
 #  -- auth setup --
 
+# Read once; the resource and tool below serve this same string instead of
+# re-reading the file on every fetch
 with open('instructions.txt', 'r') as f:
-    instructions = f.read()
+    _INSTRUCTIONS = f.read()
 
-mcp = FastMCP(name="Helix Codebase MCP", instructions=instructions)
+mcp = FastMCP(name="Helix Codebase MCP", instructions=_INSTRUCTIONS)
 db = helix.Client(local=True, port=6969, verbose=True)
 gemini_client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
 
@@ -53,13 +58,45 @@ ALLOWED_ENDPOINTS = {
     "getSuperEntity"
 }
 
-def extract_endpoints_with_types(file_path: str = None) -> Dict[str, Dict[str, type]]:
+# Patterns for parsing queries.hx, compiled once at import so reloads and
+# repeat calls don't pay regex compilation again
+_QUERY_RE = re.compile(r'QUERY\s+(\w+)\s*\((.*?)\)\s*=>', re.DOTALL)
+_PARAM_RE = re.compile(r'(\w+):\s*(\[?\w+\]?)')
+
+def make_validator(params: Dict[str, type]):
+    """Compile an endpoint's parameter schema into a closure doing the exact checks inline."""
+    checks = []
+    for name, expected_type in params.items():
+        is_list = getattr(expected_type, '__origin__', None) is list
+        checks.append((name, list if is_list else expected_type, is_list))
+    required = frozenset(params)
+
+    def validate(payload: Dict[str, Any]):
+        missing = required - payload.keys()
+        if missing:
+            raise ValueError(f"Missing parameters: {missing}")
+        for name, expected, is_list in checks:
+            value = payload[name]
+            if not isinstance(value, expected):
+                if is_list:
+                    raise ValueError(f"{name} must be a list")
+                raise ValueError(f"{name} must be {expected.__name__}, got {type(value).__name__}")
+
+    return validate
+
+def extract_endpoints_with_types(file_path: str = None) -> Dict[str, tuple]:
     if file_path is None:
         # Get the directory where this script is located
         script_dir = os.path.dirname(os.path.abspath(__file__))
         # Go up one level to the project root, then into helixdb-cfg/queries.hx
         file_path = os.path.join(script_dir, '..', 'helixdb-cfg', 'queries.hx')
-    
+
+    # Keyed on mtime too, so an edited queries.hx is re-parsed while
+    # repeat imports/reloads of an unchanged file hit the cache
+    return _extract_endpoints(file_path, os.path.getmtime(file_path))
+
+@functools.lru_cache(maxsize=8)
+def _extract_endpoints(file_path: str, mtime: float) -> Dict[str, tuple]:
     type_map = {
         'String': str,
         'ID': str, 
@@ -75,22 +112,24 @@ def extract_endpoints_with_types(file_path: str = None) -> Dict[str, Dict[str, t
     with open(file_path, 'r') as file:
         content = file.read()
     
-    matches = re.findall(r'QUERY\s+(\w+)\s*\((.*?)\)\s*=>', content, re.DOTALL)
-    
-    for func_name, params_str in matches:
-        param_types = {}
-        if params_str.strip():
-            params = re.findall(r'(\w+):\s*(\[?\w+\]?)', params_str)
-            for param_name, type_name in params:
-                param_types[param_name] = type_map.get(type_name, Any)
-        
-        endpoints[func_name] = param_types
-    
-    return endpoints
+    # One pass: each endpoint's params stream straight from finditer into
+    # its compiled validator, with no intermediate match list
+    for match in _QUERY_RE.finditer(content):
+        param_types = {param.group(1): type_map.get(param.group(2), Any)
+                       for param in _PARAM_RE.finditer(match.group(2))}
+        endpoints[match.group(1)] = (param_types, make_validator(param_types))
+
+    # Immutable view: the dict is shared across callers via the cache
+    return types.MappingProxyType(endpoints)
 
-# currently stored in memory
+# Each endpoint's parameter schema paired with its compiled validator
 endpoints_with_types = extract_endpoints_with_types()
 
+# Anything allowed but missing from queries.hx could never validate anyway,
+# so intersecting here leaves do_query with exactly one membership check
+ALLOWED_ENDPOINTS = frozenset(ALLOWED_ENDPOINTS) & endpoints_with_types.keys()
+_ALLOWED_SORTED = ', '.join(sorted(ALLOWED_ENDPOINTS))
+
 @mcp.tool
 def do_query(endpoint: str, payload: Dict[str, Any]) -> List[Any]:
     """
@@ -123,30 +162,28 @@ Args:
     """
     # Check if endpoint is allowed
     if endpoint not in ALLOWED_ENDPOINTS:
-        raise ValueError(f"Endpoint '{endpoint}' is not allowed. Permitted endpoints: {', '.join(sorted(ALLOWED_ENDPOINTS))}")
-    
-    if endpoint not in endpoints_with_types:
-        raise ValueError(f"Unknown endpoint: {endpoint}")
-    
-    required_params = endpoints_with_types[endpoint]
-    
-    missing = set(required_params.keys()) - set(payload.keys())
-    if missing:
-        raise ValueError(f"Missing parameters: {missing}")
-    
-    for param, expected_type in required_params.items():
-        if param in payload:
-            value = payload[param]
-            
-            if hasattr(expected_type, '__origin__') and expected_type.__origin__ is list:
-                if not isinstance(value, list):
-                    raise ValueError(f"{param} must be a list")
-            elif not isinstance(value, expected_type):
-                raise ValueError(f"{param} must be {expected_type.__name__}, got {type(value).__name__}")
+        raise ValueError(f"Endpoint '{endpoint}' is not allowed. Permitted endpoints: {_ALLOWED_SORTED}")
+
+    _, validate = endpoints_with_types[endpoint]
+    validate(payload)
 
     print(f'Called `do_query` with endpoint: {endpoint} and payload:\n{payload}')
     return db.query(endpoint, payload)
 
+# Must match the mode the ingestion side stored vectors with
+QUANTIZE_MODE = os.getenv('HELIX_QUANTIZE_MODE', 'int8')
+
+def quantize_vec(vector, mode=None):
+    """Quantize a query vector into the space the ingestion path stores."""
+    mode = QUANTIZE_MODE if mode is None else mode
+    v = np.asarray(vector, dtype=np.float32)
+    if mode == 'int8':
+        peak = float(np.max(np.abs(v))) or 1.0
+        return np.rint(v * (127.0 / peak)).astype(np.int8).tolist()
+    if mode == 'binary':
+        return (v > 0).astype(np.int8).tolist()
+    return v.tolist()
+
 @mcp.tool
 def semantic_search_code(query: str, k: int = 5) -> List[Any]:
     """
@@ -163,16 +200,15 @@ def semantic_search_code(query: str, k: int = 5) -> List[Any]:
         contents=query,
         config=genai.types.EmbedContentConfig(task_type="CODE_RETRIEVAL_QUERY"))
     
-    query_vector = result.embeddings[0].values
+    # Quantized to match the stored vectors (see quantize_vec in the ingestion script)
+    query_vector = quantize_vec(result.embeddings[0].values)
 
     print(f'Called `semantic_search_code` with query: {query} and k: {k}')
     return db.query("searchSuperEntity", {"vector": query_vector, "k": k})
 
 @mcp.tool
 def get_instructions():
-    with open('instructions.txt', 'r') as f:
-        instructions = f.read()
-        return instructions
+    return _INSTRUCTIONS
 
 @mcp.resource("meta://about")
 def about():
@@ -183,9 +219,7 @@ def about():
 
 @mcp.resource("meta://instructions")
 def instructions():
-    with open('instructions.txt', 'r') as f:
-        instructions = f.read()
-        return instructions
+    return _INSTRUCTIONS
 
 if __name__ == "__main__":
     PORT = os.getenv("PORT", 8000)
@@ -5,9 +5,23 @@ import time
 import argparse
 import pathspec
 import hashlib
-from concurrent.futures import ThreadPoolExecutor
+import threading
+import queue
+import logging
+import logging.handlers
+import mmap
+import sqlite3
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from array import array
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from helix import Client, Instance
 
+# Module logger; per-entity chatter goes to DEBUG so the hot path stays quiet
+log = logging.getLogger(__name__)
+
 # Default patterns to always ignore
 DEFAULT_IGNORE_PATTERNS = ['.git/']
 
@@ -26,19 +40,128 @@ MAX_DEPTH = 2
 instance = Instance()
 time.sleep(1)
 
+class PooledClient(Client):
+    """Helix client that reuses pooled keep-alive connections.
+
+    The stock client sends each query through urllib.request.urlopen, which
+    opens a fresh TCP connection per request; ingestion fires thousands of
+    queries, so the handshakes add up. Route requests through a shared
+    requests.Session with pooled adapters instead.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=64)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+    def _send_reqs(self, data, total, endpoint, query=None, verbose=True):
+        headers = {'Content-Type': 'application/json'}
+        if not self.local and self.api_key is not None:
+            headers['x-api-key'] = self.api_key
+
+        responses = []
+        for d in data:
+            response = self._session.post(endpoint, json=d, headers=headers)
+            if response.status_code >= 400:
+                raise Exception(f"Query to {endpoint} failed ({response.status_code}): {response.text}")
+            body = response.json()
+            responses.append(query.response(body) if query is not None else body)
+        return responses
+
 # HelixDB Client
-client = Client(local=True, verbose=False)
+client = PooledClient(local=True, verbose=False)
 
 # Thread pool for parallel processing
 MAX_WORKERS = min(os.cpu_count()//2, 8)
 executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
 
+# Process pool for the CPU-bound parse + tree extraction; 'fork' so workers
+# inherit the initialized parsers without re-running import side effects
+# (the Instance() startup above)
+parse_executor = ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                     mp_context=multiprocessing.get_context('fork'))
+
 # Cache for seen files to avoid re-parsing
 seen_files = set()
 
 # Cache for directory-specific PathSpecs
 spec_map = {}
 
+# Number of chunks to embed per batched call
+EMBED_BATCH_SIZE = 32
+
+# Number of buffered chunks to collect before length-sorted batching kicks in
+EMBED_SORT_WINDOW = EMBED_BATCH_SIZE * 8
+
+# Buffer of (entity_id, chunk_text) pairs waiting to be embedded
+embed_buffer = []
+embed_buffer_lock = threading.Lock()
+
+# Bounded queue of batches feeding the embed+insert consumer; the bound
+# applies backpressure to the parse workers when embedding falls behind
+EMBED_QUEUE_SIZE = 4
+embed_queue = queue.Queue(maxsize=EMBED_QUEUE_SIZE)
+
+# Model tag mixed into cache keys so vectors from different models never collide
+# TODO: Update when a real embedding model is wired in
+EMBED_MODEL_NAME = 'random-embedding-768'
+
+# Persistent chunk-hash -> vector cache so re-ingesting unchanged chunks skips the embedder
+EMBED_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.helix_embed_cache', 'embeddings.db')
+os.makedirs(os.path.dirname(EMBED_CACHE_PATH), exist_ok=True)
+embed_cache = sqlite3.connect(EMBED_CACHE_PATH, check_same_thread=False)
+embed_cache.execute('CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB)')
+embed_cache_lock = threading.Lock()
+
+def embed_cache_key(chunk):
+    return hashlib.sha256((EMBED_MODEL_NAME + chunk).encode('utf8')).digest()
+
+# Near-duplicate vector reuse (trades a little precision for cache hits on
+# trivial edits like reformats); off unless HELIX_FUZZY_EMBED_CACHE=1
+FUZZY_EMBED_CACHE = os.getenv('HELIX_FUZZY_EMBED_CACHE', '0') == '1'
+
+# Maximum Hamming distance between SimHash fingerprints to count as a near-duplicate
+SIMHASH_MAX_DISTANCE = 3
+
+# Fingerprints bucketed by four 16-bit bands; a fingerprint within distance 3
+# is guaranteed to share at least one band with its match
+simhash_bands = [{}, {}, {}, {}]
+simhash_lock = threading.Lock()
+
+def simhash(text):
+    """Compute a 64-bit SimHash over 3-token shingles of the text."""
+    tokens = text.split()
+    weights = [0] * 64
+    for i in range(max(len(tokens) - 2, 1)):
+        shingle = ' '.join(tokens[i:i+3])
+        h = int.from_bytes(hashlib.sha1(shingle.encode('utf8')).digest()[:8], 'little')
+        for bit in range(64):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    fingerprint = 0
+    for bit in range(64):
+        if weights[bit] > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+def fuzzy_cache_lookup(fingerprint):
+    """Return a cached vector whose fingerprint is within SIMHASH_MAX_DISTANCE, if any."""
+    with simhash_lock:
+        for band, bucket_map in enumerate(simhash_bands):
+            bucket = bucket_map.get((fingerprint >> (band * 16)) & 0xFFFF)
+            if not bucket:
+                continue
+            for candidate, vector in bucket:
+                if (candidate ^ fingerprint).bit_count() <= SIMHASH_MAX_DISTANCE:
+                    return vector
+    return None
+
+def fuzzy_cache_store(fingerprint, vector):
+    with simhash_lock:
+        for band, bucket_map in enumerate(simhash_bands):
+            bucket_map.setdefault((fingerprint >> (band * 16)) & 0xFFFF, []).append((fingerprint, vector))
+
 # Ingestion function
 def ingestion(root_path):
     # Ensure root_path is absolute
@@ -50,14 +173,130 @@ def ingestion(root_path):
     root_id = client.query('createRoot', {'name': root_path})[0]['root'][0]['id']
     populate(root_path, parent_id=root_id, gitignore_specs=gitignore_specs, root_dir=root_dir)
 
+    # Hand any partial batch to the consumer, then shut it down
+    with embed_buffer_lock:
+        batch = embed_buffer[:]
+        embed_buffer.clear()
+    if batch:
+        embed_queue.put(batch)
+    embed_queue.put(None)
+    embed_thread.join()
+
+# Chunk size in bytes for the placeholder chunker
+CHUNK_SIZE = 1000
+
 # Modifiable helper functions
 # TODO: Replace with actual chunking function
 def chunk_entity(text:str):
-    return [text[i:i+1000] for i in range(0, len(text), 1000)]
+    # Encode once and slice through a memoryview so each window is a cheap
+    # buffer view rather than a fresh str copy; errors='ignore' drops any
+    # multi-byte character split at a window boundary
+    data = memoryview(text.encode('utf8'))
+    return [bytes(data[i:i+CHUNK_SIZE]).decode('utf8', errors='ignore') for i in range(0, len(data), CHUNK_SIZE)]
+
+# Random generator for placeholder embeddings
+_rng = np.random.default_rng()
 
 # TODO: Replace with actual embedding function
 def random_embedding(text:str):
-    return [0.1 for _ in range(768)]
+    # One C-level fill of the vector instead of 768 interpreter iterations;
+    # .tolist() keeps the payload JSON-serializable for the helix client
+    return _rng.random(768, dtype=np.float32).tolist()
+
+# TODO: Replace with actual batched embedding call (e.g. embed_content with contents=[...])
+def embed_batch(texts:list):
+    return [random_embedding(text) for text in texts]
+
+def queue_embedding(entity_id, chunk):
+    """Buffer a chunk for embedding, handing a full window to the embed consumer."""
+    with embed_buffer_lock:
+        embed_buffer.append((entity_id, chunk))
+        if len(embed_buffer) < EMBED_SORT_WINDOW:
+            return
+        batch = embed_buffer[:]
+        embed_buffer.clear()
+    embed_queue.put(batch)
+
+def flush_embeddings(batch):
+    """Embed a batch of buffered chunks in one call and bulk-insert the vectors."""
+    if not batch:
+        return
+
+    # Serve unchanged chunks from the persistent cache; only misses hit the embedder
+    keys = [embed_cache_key(chunk) for _, chunk in batch]
+    vectors = [None] * len(batch)
+    misses = []
+    with embed_cache_lock:
+        for i, key in enumerate(keys):
+            row = embed_cache.execute('SELECT vector FROM embeddings WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                vectors[i] = array('d', row[0]).tolist()
+            else:
+                misses.append(i)
+
+    # Optional near-duplicate layer: reuse the vector of any chunk embedded this
+    # run whose SimHash is within a few bits of the miss
+    fingerprints = {}
+    if FUZZY_EMBED_CACHE and misses:
+        still_missing = []
+        for i in misses:
+            fingerprint = simhash(batch[i][1])
+            fingerprints[i] = fingerprint
+            vector = fuzzy_cache_lookup(fingerprint)
+            if vector is not None:
+                vectors[i] = vector
+            else:
+                still_missing.append(i)
+        misses = still_missing
+
+    # Sort misses by text length so each embed batch pads to a similar max length,
+    # tracking original positions so vectors land back in insertion order
+    order = sorted(misses, key=lambda i: len(batch[i][1]))
+    for start in range(0, len(order), EMBED_BATCH_SIZE):
+        group = order[start:start + EMBED_BATCH_SIZE]
+        for i, vector in zip(group, embed_batch([batch[i][1] for i in group])):
+            vectors[i] = vector
+
+    # Write freshly embedded vectors back to the caches
+    if FUZZY_EMBED_CACHE:
+        for i in order:
+            fuzzy_cache_store(fingerprints[i], vectors[i])
+    if order:
+        with embed_cache_lock:
+            embed_cache.executemany('INSERT OR REPLACE INTO embeddings VALUES (?, ?)',
+                                    [(keys[i], array('d', vectors[i]).tobytes()) for i in order])
+            embed_cache.commit()
+
+    payload = [{'entity_id': entity_id, 'vector': quantize_vec(vector)} for (entity_id, _), vector in zip(batch, vectors)]
+    client.query('embedSuperEntity', payload)
+
+def quantize_vec(vector):
+    """Symmetric int8 quantization of an embedding vector.
+
+    schema.hx only has an [F64] vector type, so storage stays float-typed;
+    the win is on the wire, where components serialize as 1-4 byte integers
+    instead of ~18-byte floats. The per-vector scale isn't kept because
+    cosine similarity is scale-invariant. Query vectors must be quantized
+    the same way (see semantic_search_code in mcp_server/server.py).
+    """
+    v = np.asarray(vector, dtype=np.float32)
+    peak = float(np.max(np.abs(v))) or 1.0
+    return np.rint(v * (127.0 / peak)).astype(np.int8).tolist()
+
+def embed_worker():
+    """Consumer stage: drain batches from the queue and embed+insert them."""
+    while True:
+        batch = embed_queue.get()
+        if batch is None:
+            break
+        try:
+            flush_embeddings(batch)
+        except Exception as e:
+            log.error(f"Error embedding batch: {e}")
+
+# Embed+insert consumer thread, fed by the parse workers through embed_queue
+embed_thread = threading.Thread(target=embed_worker, daemon=True)
+embed_thread.start()
 
 # Helper functions
 def populate(full_path, curr_type='root', parent_id=None, gitignore_specs=None, root_dir=None):
@@ -67,42 +306,39 @@ def populate(full_path, curr_type='root', parent_id=None, gitignore_specs=None,
     gitignore_specs = dir_dict.get("gitignore_specs", gitignore_specs)
     root_dir = dir_dict.get("root_dir", root_dir)
 
-    print(f'\nProcessing {len(dir_dict["folders"])} folders')
+    log.debug(f'Processing {len(dir_dict["folders"])} folders')
     
     # Store futures for parallel folder processing
     folder_futures = []
     
-    # First create all folder entries
+    # Create each folder and recurse inside the thread pool so sibling
+    # folder-creation round-trips overlap instead of serializing here
     for folder in dir_dict["folders"]:
-        print(f"\nProcessing folder: {folder}")
-        if curr_type == 'root':
-            # Create super folder
-            folder_id = client.query('createSuperFolder', {'root_id': parent_id, 'name': folder})[0]['folder'][0]['id']
-        else:
-            # Create sub folder
-            folder_id = client.query('createSubFolder', {'folder_id': parent_id, 'name': folder})[0]['subfolder'][0]['id']
-        
-        # Submit folder processing to thread pool for parallel execution
-        folder_path = os.path.join(full_path, folder)
+        log.debug(f"Processing folder: {folder}")
         folder_futures.append(executor.submit(
-            populate, 
-            folder_path, 
-            'folder', 
-            folder_id, 
-            gitignore_specs, 
+            create_and_populate_folder,
+            full_path,
+            folder,
+            curr_type,
+            parent_id,
+            gitignore_specs,
             root_dir
         ))
 
     # Process files in parallel
-    print(f'\nProcessing {len(dir_dict["files"])} files')
+    log.debug(f'Processing {len(dir_dict["files"])} files')
     
     # Filter out ignored files
     files_to_process = [file for file in dir_dict["files"] if not is_ignored(os.path.join(full_path, file), gitignore_specs, root_dir)]
-    
+
+    # Start kernel readahead for the whole batch before any worker reads, so
+    # cold-cache I/O overlaps instead of each parse waiting on its own pread
+    prefetch_files([os.path.join(full_path, file) for file in files_to_process])
+
     # Submit file processing tasks to the thread pool
     file_futures = []
     for file in files_to_process:
-        print(f"\nSubmitting {file} for processing")
+        log.debug(f"Submitting {file} for processing")
         file_futures.append(executor.submit(
             process_file,
             file,
@@ -116,19 +352,43 @@ def populate(full_path, curr_type='root', parent_id=None, gitignore_specs=None,
         try:
             success = future.result()
         except Exception as e:
-            print(f"Error in file processing: {e}")
+            log.error(f"Error in file processing: {e}")
     
     # Wait for all folder processing to complete
     for future in folder_futures:
         try:
             future.result()
         except Exception as e:
-            print(f"Error in folder processing: {e}")
-    
-    del dir_dict
+            log.error(f"Error in folder processing: {e}")
+
+def prefetch_files(paths):
+    """Hint the kernel to read the given files ahead of the parse workers."""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                # WILLNEED returns immediately; readahead proceeds in the background
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+
+def create_and_populate_folder(full_path, folder, curr_type, parent_id, gitignore_specs, root_dir):
+    if curr_type == 'root':
+        # Create super folder
+        folder_id = client.query('createSuperFolder', {'root_id': parent_id, 'name': folder})[0]['folder'][0]['id']
+    else:
+        # Create sub folder
+        folder_id = client.query('createSubFolder', {'folder_id': parent_id, 'name': folder})[0]['subfolder'][0]['id']
+
+    populate(os.path.join(full_path, folder), 'folder', folder_id, gitignore_specs, root_dir)
 
 def process_file(file, full_path, curr_type, parent_id):
-    print(f"{file} is from {curr_type}")
+    log.debug(f"{file} is from {curr_type}")
     try:
         parser = None
         if file.endswith('.py'):
@@ -139,16 +399,22 @@ def process_file(file, full_path, curr_type, parent_id):
             parser = None
         
         if parser is not None:
-            # Extract python code structure with tree-sitter
+            # Parse and extract in the process pool so the tree walk runs
+            # outside the GIL of this process
             file_path = os.path.join(full_path, file)
             extension = file.split('.')[-1]
-            tree, code = parse_file(file_path, parser)
-
-            if tree:
-                tree_dict = node_to_dict(tree.root_node, code, 0)
-                del tree
-                del code
+            file_hash, tree_dict = parse_executor.submit(_parse_and_extract, file_path).result()
+
+            # Duplicate-content tracking stays in this process since pool
+            # workers don't share seen_files
+            if file_hash is not None:
+                if file_hash in seen_files:
+                    log.debug(f"Ignored duplicate: {file_path}")
+                    tree_dict = None
+                else:
+                    seen_files.add(file_hash)
 
+            if tree_dict:
                 if curr_type == 'root':
                     # Create super file
                     file_id = client.query('createSuperFile', {'root_id': parent_id, 'name': file, 'extension': extension, 'text': tree_dict['text']})[0]['file'][0]['id']
@@ -157,85 +423,154 @@ def process_file(file, full_path, curr_type, parent_id):
                     file_id = client.query('createFile', {'folder_id': parent_id, 'name': file, 'extension': extension, 'text': tree_dict['text']})[0]['file'][0]['id']
 
                 children = tree_dict['children']
-                del tree_dict
 
-                print(f"\nProcessing {len(children)} super entities in {file}")
-                for superentity in children:
-                    # Create super entity
-                    super_entity_id = client.query('createSuperEntity', {'file_id': file_id, 'entity_type': superentity['type'], 'start_byte': superentity['start_byte'], 'end_byte': superentity['end_byte'], 'order': superentity['order'], 'text': superentity['text']})[0]['entity'][0]['id']
-                    
-                    # Embed super entity
-                    chunks = chunk_entity(superentity['text'])
-                    for chunk in chunks:
-                        client.query('embedSuperEntity', {'entity_id':super_entity_id, 'vector': random_embedding(chunk)})
-                        del chunk
+                log.debug(f"Processing {len(children)} super entities in {file}")
+                if children:
+                    # Create all super entities for the file in one bulk call
+                    payload = [{'file_id': file_id, 'entity_type': superentity['type'], 'start_byte': superentity['start_byte'], 'end_byte': superentity['end_byte'], 'order': superentity['order'], 'text': superentity['text']} for superentity in children]
+                    super_entity_ids = [entity['entity'][0]['id'] for entity in client.query('createSuperEntity', payload)]
 
-                    del chunks
+                    for superentity, super_entity_id in zip(children, super_entity_ids):
+                        # Queue super entity chunks for batched embedding
+                        chunks = chunk_entity(superentity['text'])
+                        for chunk in chunks:
+                            queue_embedding(super_entity_id, chunk)
 
-                    process_entities(superentity, super_entity_id)
-                    
-                    del superentity
+                    # One walk covers every super entity's subtree, so each
+                    # depth level of the whole file is a single bulk call
+                    process_entities(list(zip(children, super_entity_ids)))
 
-                del children
                 return True
             else:
-                print(f'Failed to parse file: {file}')
-                if tree is not None:
-                    del tree
-                if code is not None:
-                    del code
+                log.warning(f'Failed to parse file: {file}')
                 return False
         else:
-            print(f'Ignored: {file}')
+            log.debug(f'Ignored: {file}')
             return False
     except Exception as e:
-        print(f"Error processing file {file}: {e}")
+        log.error(f"Error processing file {file}: {e}")
         return False
 
-def process_entities(parent_dict, parent_id, step = 0):
-    if step < MAX_DEPTH and 'children' in parent_dict and len(parent_dict['children']) > 0:
+def process_entities(level):
+    # Explicit level-order walk over (node_dict, entity_id) pairs; no recursion,
+    # and each level across all parents is one bulk createSubEntity call
+    for step in range(MAX_DEPTH):
+        payload = []
+        nodes = []
+        for parent, pid in level:
+            for entity in parent.get('children', []):
+                payload.append({'entity_id': pid, 'entity_type': entity['type'], 'start_byte': entity['start_byte'], 'end_byte': entity['end_byte'], 'order': entity['order'], 'text': entity['text']})
+                nodes.append(entity)
 
-        children = parent_dict['children']
-        payload = [{'entity_id': parent_id, 'entity_type': entity['type'], 'start_byte': entity['start_byte'], 'end_byte': entity['end_byte'], 'order': entity['order'], 'text': entity['text']} for entity in children]
-        
         if len(payload) < 1:
             return
         entity_ids = [entity['entity'][0]['id'] for entity in client.query('createSubEntity', payload)]
-        del payload
+        level = list(zip(nodes, entity_ids))
 
-        for i in range(len(entity_ids)):
-            process_entities(children[i], entity_ids[i], step + 1)
+# Cache of path -> (mtime, tree, source) so re-ingesting in the same process
+# reuses trees outright when unchanged and re-parses incrementally when not
+# (per parse-pool worker, since each process has its own copy)
+_tree_cache = {}
 
-        del children
-        del entity_ids
+def _end_point(source):
+    """(row, column) of the end of the buffer, as a tree-sitter point."""
+    buf = source if isinstance(source, bytes) else bytes(source)
+    return buf.count(b'\n'), len(buf) - (buf.rfind(b'\n') + 1)
 
 def parse_file(file_path, parser):
     try:
+        mtime = os.path.getmtime(file_path)
+        cached = _tree_cache.get(file_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1], cached[2]
+
         with open(file_path, 'rb') as file:
-            source_code = file.read()
-            
-        # Calculate file hash to avoid re-parsing identical files
-        file_hash = hashlib.sha1(source_code).hexdigest()
-        if file_hash in seen_files:
-            print(f"Ignored duplicate: {file_path}")
-            return None, None
-            
-        seen_files.add(file_hash)
-        return parser.parse(source_code), source_code
+            try:
+                # Map the file instead of copying it into a heap buffer;
+                # tree-sitter scans the pages in place and downstream slices
+                # stay cheap buffer reads. The mapping outlives the fd.
+                source_code = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Zero-length files can't be mapped
+                source_code = file.read()
+
+        old_tree = None
+        if cached is not None:
+            # Mark the whole file as edited; tree-sitter's incremental parse
+            # still reuses any subtrees that turn out to be unchanged
+            _, old_tree, old_source = cached
+            old_tree.edit(
+                start_byte=0,
+                old_end_byte=len(old_source),
+                new_end_byte=len(source_code),
+                start_point=(0, 0),
+                old_end_point=_end_point(old_source),
+                new_end_point=_end_point(source_code),
+            )
+
+        tree = parser.parse(source_code, old_tree)
+        _tree_cache[file_path] = (mtime, tree, source_code)
+        return tree, source_code
     except Exception as e:
-        print(f"Error parsing {file_path}: {e}")
+        log.error(f"Error parsing {file_path}: {e}")
         return None, None
 
-def node_to_dict(node, source_code, order:int=1):
+def _parse_and_extract(file_path):
+    """Parse a file and convert its AST to a dict; runs in a parse-pool worker.
+
+    Returns (content_hash, tree_dict); the tree itself never crosses the
+    process boundary since tree-sitter trees don't pickle.
+    """
+    tree, code = parse_file(file_path, py_parser)
+    if tree is None:
+        return None, None
+
+    file_hash = hashlib.sha1(code).hexdigest()
+    return file_hash, node_to_dict(tree.root_node, code, 0)
+
+# Deepest level whose text is ever written to the DB: the file root, its
+# super entities, and MAX_DEPTH levels of sub entities below them. Nodes
+# deeper than this never become entities, so decoding their text is waste.
+MAX_TEXT_DEPTH = MAX_DEPTH + 1
+
+def _node_record(node, source_code, order, with_text):
     return {
         "type": node.type,
         "start_byte": node.start_byte,
         "end_byte": node.end_byte,
         "order": order,
-        "text": source_code[node.start_byte:node.end_byte].decode('utf8'),
-        "children": [node_to_dict(child, source_code, i+1) for i, child in enumerate(node.children)]
+        "text": source_code[node.start_byte:node.end_byte].decode('utf8') if with_text else None,
+        "children": []
     }
 
+def node_to_dict(node, source_code, order:int=1):
+    # Iterative DFS with tree-sitter's TreeCursor: the cursor walks the tree in
+    # C without materializing child Node lists, and the explicit stack avoids
+    # one Python frame per node (and the recursion limit on deep trees).
+    # Invariant: stack[-1] is the dict for the node the cursor points at.
+    cursor = node.walk()
+    root = _node_record(cursor.node, source_code, order, True)
+    stack = [root]
+    ascending = False
+    while True:
+        if not ascending and cursor.goto_first_child():
+            parent = stack[-1]
+            child = _node_record(cursor.node, source_code, len(parent["children"]) + 1, len(stack) <= MAX_TEXT_DEPTH)
+            parent["children"].append(child)
+            stack.append(child)
+        elif cursor.goto_next_sibling():
+            stack.pop()
+            parent = stack[-1]
+            child = _node_record(cursor.node, source_code, len(parent["children"]) + 1, len(stack) <= MAX_TEXT_DEPTH)
+            parent["children"].append(child)
+            stack.append(child)
+            ascending = False
+        elif cursor.goto_parent():
+            stack.pop()
+            ascending = True
+        else:
+            return root
+
 # Cache for PathSpec objects to avoid rebuilding them
 _spec_cache = {}
 
@@ -278,7 +613,7 @@ def get_spec_for_path(path, gitignore_specs):
                 if patterns:
                     path_specs[abs_path] = get_spec(patterns)
         except Exception as e:
-            print(f"Error reading {local_gitignore}: {e}")
+            log.error(f"Error reading {local_gitignore}: {e}")
     
     # Cache the result
     spec_map[abs_path] = path_specs
@@ -316,11 +651,11 @@ def load_gitignore_specs(root_path):
                     # Filter out empty lines and comments
                     patterns = [p for p in patterns if p and not p.startswith('#')]
                     if patterns:
-                        print(f"Found .gitignore at {current_path}")
+                        log.debug(f"Found .gitignore at {current_path}")
                         pattern_lists[current_path] = patterns
                         specs[current_path] = get_spec(patterns)
             except Exception as e:
-                print(f"Error reading {gitignore_path}: {e}")
+                log.error(f"Error reading {gitignore_path}: {e}")
         
         # Move up one directory
         parent_path = os.path.dirname(current_path)
@@ -395,7 +730,7 @@ def is_ignored(path, gitignore_specs, root_dir):
                 # Skip if paths can't be compared (different drives, etc.)
                 continue
         except Exception as e:
-            print(f"Error checking if {path} is ignored: {e}")
+            log.error(f"Error checking if {path} is ignored: {e}")
             continue
     
     return False
@@ -414,32 +749,45 @@ def scan_directory(root_path, gitignore_specs=None, root_dir=None):
     
     # Check if the directory itself is ignored
     if is_ignored(root_path, gitignore_specs, root_dir):
-        print(f"Ignored: {root_path}")
+        log.debug(f"Ignored: {root_path}")
         return {"folders": [], "files": []}
     
     # Get or update gitignore specs for this path
     gitignore_specs = get_spec_for_path(root_path, gitignore_specs)
     
-    # Scan directory
-    for entry in os.scandir(root_path):
-        # Skip ignored files and folders
-        if is_ignored(entry.path, gitignore_specs, root_dir):
-            print(f"Ignored: {entry.name}")
-            continue
-        
-        if entry.is_dir():
-            folders.append(entry.name)
-        else:
-            files.append(entry.name)
-    
+    # Scan directory; DirEntry.is_dir with follow_symlinks=False classifies
+    # from the cached d_type, so no extra stat per entry
+    with os.scandir(root_path) as entries:
+        for entry in entries:
+            # Skip ignored files and folders
+            if is_ignored(entry.path, gitignore_specs, root_dir):
+                log.debug(f"Ignored: {entry.name}")
+                continue
+
+            if entry.is_dir(follow_symlinks=False):
+                folders.append(entry.name)
+            else:
+                files.append(entry.name)
+
     return {"folders": folders, "files": files, "gitignore_specs": gitignore_specs, "root_dir": root_dir}
 
 if __name__ == "__main__":
     argparser = argparse.ArgumentParser(description="HelixDB Codebase Ingestion")
     argparser.add_argument("root", help="root directory of codebase", nargs="?", type=str, default=os.getcwd())
+    argparser.add_argument("-v", "--verbose", help="log per-file progress", action="store_true")
     args = argparser.parse_args()
+
+    # Route records through a queue so formatting and the write syscall happen
+    # on the listener thread instead of blocking the ingestion workers
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+    listener.start()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING,
+                        handlers=[logging.handlers.QueueHandler(log_queue)])
+
     print(f"Scanning Codebase at: {args.root}\n")
     start_time = time.time()
     ingestion(args.root)
     print(f"\nInstance ID: {instance.instance_id}")
-    print(f"Time taken: {time.time() - start_time}")
\ No newline at end of file
+    print(f"Time taken: {time.time() - start_time}")
+    listener.stop()
\ No newline at end of file